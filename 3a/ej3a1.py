@@ -20,12 +20,30 @@ import os
 # Para una base de datos en archivo, usar: 'biblioteca.db'
 DB_PATH = ':memory:'
 
+# PRAGMAs de rendimiento que se aplican a cada conexión nueva:
+# menos fsync, temporales en memoria, caché de 64 MiB y lectura mediante mmap
+PRAGMAS = (
+    "synchronous=NORMAL",
+    "temp_store=MEMORY",
+    "cache_size=-65536",
+    "mmap_size=268435456",
+    "busy_timeout=5000",
+)
+
 def crear_conexion():
     """
     Crea y devuelve una conexión a la base de datos SQLite
     """
     # Implementa la creación de la conexión y retorna el objeto conexión
-    return sqlite3.connect(DB_PATH)
+    # isolation_level=None: autocommit; las operaciones agrupadas abren su propio BEGIN.
+    # cached_statements amplía la caché de sentencias preparadas (128 por defecto)
+    conexion = sqlite3.connect(DB_PATH, cached_statements=512, isolation_level=None)
+    # El modo WAL solo tiene sentido para bases de datos en archivo
+    if DB_PATH != ':memory:':
+        conexion.execute("PRAGMA journal_mode=WAL")
+    for pragma in PRAGMAS:
+        conexion.execute(f"PRAGMA {pragma}")
+    return conexion
 
 def crear_tablas(conexion : sqlite3.Connection):
     """
@@ -36,15 +54,31 @@ def crear_tablas(conexion : sqlite3.Connection):
     """
     # Implementa la creación de tablas usando SQL
     # Usa conexion.cursor() para crear un cursor y ejecutar comandos SQL
-    cursor = conexion.cursor()
-    cursor.execute("create table autores(id int primary key, nombre text)")
-    cursor.execute("""create table libros(
-                   id int primary key, 
-                   titulo text, 
-                   anio int, 
-                   autor_id int, 
-                   FOREIGN KEY(autor_id) REFERENCES autores(id))
-                   """)
+    # Un único script para todo el DDL. INTEGER PRIMARY KEY hace que id sea un alias
+    # del rowid (sin un segundo B-tree)
+    conexion.executescript("""
+        CREATE TABLE autores(
+            id INTEGER PRIMARY KEY,
+            nombre TEXT NOT NULL
+        );
+        CREATE TABLE libros(
+            id INTEGER PRIMARY KEY,
+            titulo TEXT NOT NULL,
+            anio INTEGER,
+            autor_id INTEGER,
+            FOREIGN KEY(autor_id) REFERENCES autores(id)
+        );
+    """)
+
+def crear_indices(conexion):
+    """
+    Crea los índices secundarios usados por las consultas:
+    - libros(autor_id, titulo, anio): índice de cobertura para el JOIN por autor
+    - autores(nombre): búsqueda de autores por nombre
+    Conviene llamarla después de la carga masiva de datos, que así es más rápida
+    """
+    conexion.execute("CREATE INDEX IF NOT EXISTS idx_libros_autor ON libros(autor_id, titulo, anio)")
+    conexion.execute("CREATE INDEX IF NOT EXISTS idx_autores_nombre ON autores(nombre)")
 
 def insertar_autores(conexion, autores):
     """
@@ -53,9 +87,15 @@ def insertar_autores(conexion, autores):
     """
     # Implementa la inserción de autores usando SQL INSERT
     # Usa consultas parametrizadas para mayor seguridad
-    cursor = conexion.cursor()
-    for i, autor in enumerate(autores):
-        cursor.execute(f"INSERT INTO autores (id, nombre) VALUES ({i + 1}, '{autor[0]}')")
+    # Todas las filas se insertan en una única transacción (un solo commit)
+    with conexion:
+        if not conexion.in_transaction:
+            conexion.execute("BEGIN")
+        cursor = conexion.cursor()
+        cursor.executemany(
+            "INSERT INTO autores (id, nombre) VALUES (?, ?)",
+            ((i + 1, autor[0]) for i, autor in enumerate(autores))
+        )
 
 def insertar_libros(conexion, libros):
     """
@@ -64,9 +104,14 @@ def insertar_libros(conexion, libros):
     """
     # Implementa la inserción de libros usando SQL INSERT
     # Usa consultas parametrizadas para mayor seguridad
-    cursor = conexion.cursor()
-    for i, libro in enumerate(libros):
-        cursor.execute(f"INSERT INTO libros (id, titulo, anio, autor_id) VALUES ({i + 1}, '{libro[0]}', {libro[1]}, {libro[2]})")
+    with conexion:
+        if not conexion.in_transaction:
+            conexion.execute("BEGIN")
+        cursor = conexion.cursor()
+        cursor.executemany(
+            "INSERT INTO libros (id, titulo, anio, autor_id) VALUES (?, ?, ?, ?)",
+            ((i + 1, libro[0], libro[1], libro[2]) for i, libro in enumerate(libros))
+        )
 
 def consultar_libros(conexion):
     """
@@ -74,12 +119,15 @@ def consultar_libros(conexion):
     """
     # Implementa una consulta SQL JOIN para obtener libros con sus autores
     # Imprime los resultados formateados
+    # Un único JOIN en SQL: una sentencia por llamada y siempre coherente con la tabla
+    # autores (una caché de autores en Python habría que invalidarla ante cualquier
+    # escritura, también de otras conexiones)
     cursor = conexion.cursor()
-    books = cursor.execute("""SELECT libros.titulo, libros.anio, autores.nombre FROM libros 
-                           JOIN autores ON (libros.autor_id = autores.id)""").fetchall()
-    
-    for book in books:
-        print(f"{book[0]}: Publicado por {book[2]} en {book[1]}")
+    books = cursor.execute("""SELECT libros.titulo, libros.anio, autores.nombre FROM libros
+                           JOIN autores ON (libros.autor_id = autores.id)""")
+
+    for titulo, anio, nombre in books:
+        print(f"{titulo}: Publicado por {nombre} en {anio}")
 
 def buscar_libros_por_autor(conexion, nombre_autor):
     """
@@ -88,7 +136,9 @@ def buscar_libros_por_autor(conexion, nombre_autor):
     # Implementa una consulta SQL con WHERE para filtrar por autor
     # Retorna una lista de tuplas (titulo, anio)
     cursor = conexion.cursor()
-    return cursor.execute(f"""SELECT libros.titulo, libros.anio, autores.nombre FROM libros JOIN autores ON (libros.autor_id = autores.id) WHERE autores.nombre Like '{nombre_autor}'""").fetchall()
+    return cursor.execute("""SELECT libros.titulo, libros.anio FROM libros
+                          JOIN autores ON (libros.autor_id = autores.id)
+                          WHERE autores.nombre = ?""", (nombre_autor,)).fetchall()
 
 def actualizar_libro(conexion, id_libro, nuevo_titulo=None, nuevo_anio=None):
     """
@@ -96,11 +146,12 @@ def actualizar_libro(conexion, id_libro, nuevo_titulo=None, nuevo_anio=None):
     """
     # Implementa la actualización usando SQL UPDATE
     # Solo actualiza los campos que no son None
+    if nuevo_titulo is None and nuevo_anio is None:
+        return
+    # Una sola sentencia: COALESCE conserva el valor actual de los campos a None
     cursor = conexion.cursor()
-    if nuevo_titulo:
-        cursor.execute(f"""UPDATE libros SET titulo = '{nuevo_titulo}' WHERE id = {id_libro}""")
-    if nuevo_anio:
-        cursor.execute(f"""UPDATE libros SET anio = '{nuevo_anio}' WHERE id = {id_libro}""")
+    cursor.execute("""UPDATE libros SET titulo = COALESCE(?, titulo), anio = COALESCE(?, anio)
+                   WHERE id = ?""", (nuevo_titulo, nuevo_anio, id_libro))
 
 def eliminar_libro(conexion, id_libro):
     """
@@ -108,7 +159,7 @@ def eliminar_libro(conexion, id_libro):
     """
     # Implementa la eliminación usando SQL DELETE
     cursor = conexion.cursor()
-    cursor.execute(f"DELETE FROM libros WHERE id = {id_libro}")
+    cursor.execute("DELETE FROM libros WHERE id = ?", (id_libro,))
 
 def ejemplo_transaccion(conexion):
     """
@@ -119,7 +170,25 @@ def ejemplo_transaccion(conexion):
     # 2. Realice varias operaciones
     # 3. Si todo está bien, confirma con conexion.commit()
     # 4. En caso de error, revierte con conexion.rollback()
-    pass
+    try:
+        if not conexion.in_transaction:
+            conexion.execute("BEGIN TRANSACTION")
+        cursor = conexion.cursor()
+        cursor.execute("INSERT INTO autores (nombre) VALUES (?)", ("Miguel de Cervantes",))
+        # id es INTEGER PRIMARY KEY (alias del rowid): lastrowid es el id del autor
+        autor_id = cursor.lastrowid
+        cursor.executemany(
+            "INSERT INTO libros (titulo, anio, autor_id) VALUES (?, ?, ?)",
+            [
+                ("Don Quijote de la Mancha", 1605, autor_id),
+                ("Novelas ejemplares", 1613, autor_id)
+            ]
+        )
+        conexion.commit()
+        print("Transacción completada correctamente")
+    except sqlite3.Error as e:
+        conexion.rollback()
+        print(f"Error en la transacción, cambios revertidos: {e}")
 
 if __name__ == "__main__":
     try:
@@ -150,6 +219,9 @@ if __name__ == "__main__":
         insertar_libros(conexion, libros)
         print("Libros insertados correctamente")
 
+        # Los índices se crean tras la carga masiva
+        crear_indices(conexion)
+
         print("\n--- Lista de todos los libros con sus autores ---")
         consultar_libros(conexion)
 
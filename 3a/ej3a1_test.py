@@ -235,3 +235,32 @@ def test_ejemplo_transaccion(db_con_datos):
     # La implementación específica dependerá del estudiante,
     # pero comprobamos que al menos la función no genera errores
     assert True  # No errores = prueba pasa
+
+def test_ejemplo_transaccion_enlaza_libros_con_autor(db_con_datos):
+    """Prueba que los libros de la transacción apuntan al autor insertado en ella"""
+    ejemplo_transaccion(db_con_datos)
+
+    cursor = db_con_datos.cursor()
+    cursor.execute("""SELECT libros.titulo FROM libros
+                      JOIN autores ON libros.autor_id = autores.id
+                      WHERE autores.nombre = 'Miguel de Cervantes'""")
+    titulos = {fila[0] for fila in cursor.fetchall()}
+
+    assert titulos == {"Don Quijote de la Mancha", "Novelas ejemplares"}
+
+def test_consultar_libros_refleja_escrituras_directas(db_con_datos, capfd):
+    """Prueba que consultar_libros ve autores y libros insertados después de una consulta previa"""
+    consultar_libros(db_con_datos)
+    capfd.readouterr()
+
+    # Escritura directa, sin pasar por insertar_autores/insertar_libros
+    cursor = db_con_datos.cursor()
+    cursor.execute("INSERT INTO autores (nombre) VALUES ('Julio Cortázar')")
+    cursor.execute("INSERT INTO libros (titulo, anio, autor_id) VALUES ('Rayuela', 1963, ?)",
+                   (cursor.lastrowid,))
+
+    consultar_libros(db_con_datos)
+    salida, _ = capfd.readouterr()
+
+    assert "Rayuela: Publicado por Julio Cortázar en 1963" in salida
+    assert "Cien años de soledad" in salida
@@ -14,12 +14,22 @@ usando diferentes técnicas.
 import sqlite3
 import pandas as pd
 import os
-import json
+import orjson
 from typing import List, Dict, Any, Optional, Tuple, Union
 
 # Ruta a la base de datos SQLite
 DB_PATH = os.path.join(os.path.dirname(__file__), 'ventas_comerciales.db')
 
+# PRAGMAs de rendimiento que se aplican a cada conexión nueva:
+# menos fsync, temporales en memoria, caché de 64 MiB y lectura mediante mmap
+PRAGMAS = (
+    "synchronous=NORMAL",
+    "temp_store=MEMORY",
+    "cache_size=-65536",
+    "mmap_size=268435456",
+    "busy_timeout=5000",
+)
+
 def conectar_bd() -> sqlite3.Connection:
     """
     Conecta a una base de datos SQLite existente
@@ -36,16 +46,36 @@ def conectar_bd() -> sqlite3.Connection:
     if not os.path.isfile(DB_PATH):
         raise FileNotFoundError(f"La base de datos no existe")
     
-    connection = sqlite3.connect(DB_PATH)
+    # Conexión de solo lectura en autocommit, con caché de sentencias preparadas ampliada
+    connection = sqlite3.connect(DB_PATH, cached_statements=512, isolation_level=None)
     connection.row_factory = sqlite3.Row
+    for pragma in PRAGMAS:
+        connection.execute(f"PRAGMA {pragma}")
     return connection
 
-def convertir_a_json(conexion: sqlite3.Connection) -> Dict[str, List[Dict[str, Any]]]:
+def obtener_tablas(conexion: sqlite3.Connection) -> List[str]:
+    """
+    Obtiene los nombres de las tablas de usuario de la base de datos
+
+    Args:
+        conexion (sqlite3.Connection): Conexión a la base de datos SQLite
+
+    Returns:
+        List[str]: Nombres de las tablas, sin las tablas internas sqlite_*
+    """
+    cursor = conexion.cursor()
+    return [t[0] for t in cursor.execute(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%';"
+    )]
+
+def convertir_a_json(conexion: sqlite3.Connection,
+                     tablas: Optional[List[str]] = None) -> Dict[str, List[Dict[str, Any]]]:
     """
     Convierte los datos de la base de datos en un objeto compatible con JSON
 
     Args:
         conexion (sqlite3.Connection): Conexión a la base de datos SQLite
+        tablas (Optional[List[str]], opcional): Tablas a convertir, o None para consultarlas
 
     Returns:
         Dict[str, List[Dict[str, Any]]]: Diccionario con todas las tablas y sus registros
@@ -62,30 +92,55 @@ def convertir_a_json(conexion: sqlite3.Connection) -> Dict[str, List[Dict[str, A
     # 4. Retorna el diccionario completo con todas las tablas
     dictionary = {}
 
-    cursor = conexion.cursor()
-    tables = cursor.execute("SELECT name FROM sqlite_master WHERE type='table';").fetchall()
+    if tablas is None:
+        tablas = obtener_tablas(conexion)
 
-    for t in tables:
-        rows = cursor.execute(f"SELECT * FROM {t[0]};").fetchall()
-        columns = []
-        for d in cursor.description:
-            columns.append(d[0])
-        dictionary[t[0]] = []
+    cursor = conexion.cursor()
+    # sqlite3.Row permite convertir cada fila con dict(), que se resuelve en C
+    cursor.row_factory = sqlite3.Row
 
-        for r in rows:
-            dictionary[t[0]].append({
-                columns[i]: valor
-                for i, valor in enumerate(r)
-            })
+    for tabla in tablas:
+        # Se itera el cursor directamente para no materializar la tabla dos veces
+        dictionary[tabla] = [dict(r) for r in cursor.execute(f"SELECT * FROM {tabla};")]
 
     return dictionary
 
-def convertir_a_dataframes(conexion: sqlite3.Connection) -> Dict[str, pd.DataFrame]:
+def exportar_json(conexion: sqlite3.Connection, ruta: str,
+                  tablas: Optional[List[str]] = None) -> None:
+    """
+    Exporta todas las tablas de la base de datos a un archivo JSON con orjson
+
+    Args:
+        conexion (sqlite3.Connection): Conexión a la base de datos SQLite
+        ruta (str): Ruta del archivo JSON de salida
+        tablas (Optional[List[str]], opcional): Tablas a exportar, o None para consultarlas
+    """
+    # El resultado tiene la misma estructura que convertir_a_json, pero cada tabla se
+    # serializa y escribe por separado: en memoria solo hay una tabla a la vez y orjson
+    # genera directamente los bytes UTF-8
+    if tablas is None:
+        tablas = obtener_tablas(conexion)
+
+    cursor = conexion.cursor()
+    cursor.row_factory = sqlite3.Row
+
+    with open(ruta, 'wb') as f:
+        f.write(b"{")
+        for i, tabla in enumerate(tablas):
+            if i > 0:
+                f.write(b",")
+            f.write(orjson.dumps(tabla) + b":")
+            f.write(orjson.dumps([dict(r) for r in cursor.execute(f"SELECT * FROM {tabla};")]))
+        f.write(b"}")
+
+def convertir_a_dataframes(conexion: sqlite3.Connection,
+                           tablas: Optional[List[str]] = None) -> Dict[str, pd.DataFrame]:
     """
     Extrae los datos de la base de datos a DataFrames de pandas
 
     Args:
         conexion (sqlite3.Connection): Conexión a la base de datos SQLite
+        tablas (Optional[List[str]], opcional): Tablas a extraer, o None para consultarlas
 
     Returns:
         Dict[str, pd.DataFrame]: Diccionario con DataFrames para cada tabla y para
@@ -102,32 +157,21 @@ def convertir_a_dataframes(conexion: sqlite3.Connection) -> Dict[str, pd.DataFra
     # 5. Retorna el diccionario con todos los DataFrames
     dataframes = {}
 
-    cursor = conexion.cursor()
-    tables = cursor.execute("SELECT name FROM sqlite_master WHERE type='table';").fetchall()
-
-    for t in tables:
-        dataframes[t[0]] = pd.read_sql_query(f"SELECT * FROM {t[0]}", conexion)
-
-    dataframes['ventas_productos'] = pd.read_sql_query("""
-        SELECT v.*, p.nombre as producto_nombre, p.categoria, p.precio_unitario
-        FROM ventas v
-        JOIN productos p ON v.producto_id = p.id
-    """, conexion)
+    if tablas is None:
+        tablas = obtener_tablas(conexion)
 
-    dataframes['ventas_vendedores'] = pd.read_sql_query("""
-        SELECT v.*, vd.nombre as vendedor_nombre
-        FROM ventas v
-        JOIN vendedores vd ON v.vendedor_id = vd.id
-    """, conexion)
-
-    dataframes['vendedores_regiones'] = pd.read_sql_query("""
-        SELECT v.*, r.nombre as region_nombre, r.pais
-        FROM vendedores v
-        JOIN regiones r ON v.region_id = r.id
-    """, conexion)
+    for tabla in tablas:
+        dataframes[tabla] = pd.read_sql_query(f"SELECT * FROM {tabla}", conexion)
 
-    dataframes['ventas_completas'] = pd.read_sql_query("""
-        SELECT 
+    # Una sola consulta recorre ventas: se cargan con LEFT JOIN todas las columnas
+    # relacionadas y las vistas parciales se derivan filtrando las filas sin
+    # correspondencia, igual que haría cada INNER JOIN por separado. El filtro se hace
+    # sobre las filas de sqlite3 y no sobre un DataFrame: los NULL del LEFT JOIN
+    # convertirían en float64 columnas enteras que el INNER JOIN devuelve como int64
+    cursor = conexion.cursor()
+    cursor.row_factory = None
+    cursor.execute("""
+        SELECT
             v.*,
             p.nombre as producto_nombre,
             p.categoria,
@@ -136,11 +180,44 @@ def convertir_a_dataframes(conexion: sqlite3.Connection) -> Dict[str, pd.DataFra
             r.nombre as region_nombre,
             r.pais
         FROM ventas v
-        JOIN productos p ON v.producto_id = p.id
-        JOIN vendedores vd ON v.vendedor_id = vd.id
-        JOIN regiones r ON vd.region_id = r.id
+        LEFT JOIN productos p ON v.producto_id = p.id
+        LEFT JOIN vendedores vd ON v.vendedor_id = vd.id
+        LEFT JOIN regiones r ON vd.region_id = r.id
+    """)
+    columnas = [d[0] for d in cursor.description]
+    ventas = cursor.fetchall()
+    # Las columnas de v.* preceden a las añadidas por los JOIN (se toman de esta
+    # consulta, así no depende de que 'ventas' esté entre las tablas pedidas)
+    i_producto = n = columnas.index('producto_nombre')
+    i_vendedor = columnas.index('vendedor_nombre')
+    i_region = columnas.index('region_nombre')
+
+    def a_dataframe(filas, nombres):
+        # Misma conversión que hace pd.read_sql_query con las filas de una consulta
+        return pd.DataFrame.from_records(filas, columns=nombres, coerce_float=True)
+
+    dataframes['ventas_productos'] = a_dataframe(
+        [f[:n + 3] for f in ventas if f[i_producto] is not None],
+        columnas[:n + 3]
+    )
+
+    dataframes['ventas_vendedores'] = a_dataframe(
+        [f[:n] + (f[i_vendedor],) for f in ventas if f[i_vendedor] is not None],
+        columnas[:n] + [columnas[i_vendedor]]
+    )
+
+    dataframes['vendedores_regiones'] = pd.read_sql_query("""
+        SELECT v.*, r.nombre as region_nombre, r.pais
+        FROM vendedores v
+        JOIN regiones r ON v.region_id = r.id
     """, conexion)
 
+    dataframes['ventas_completas'] = a_dataframe(
+        [f for f in ventas
+         if f[i_producto] is not None and f[i_vendedor] is not None and f[i_region] is not None],
+        columnas
+    )
+
     return dataframes
 
 if __name__ == "__main__":
@@ -151,14 +228,13 @@ if __name__ == "__main__":
         print("Conexión establecida correctamente.")
 
         # Verificar la conexión mostrando las tablas disponibles
-        cursor = conexion.cursor()
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-        tablas = cursor.fetchall()
-        print(f"\nTablas en la base de datos: {[t[0] for t in tablas]}")
+        # (la lista se consulta una vez y se reutiliza en las conversiones)
+        tablas = obtener_tablas(conexion)
+        print(f"\nTablas en la base de datos: {tablas}")
 
         # Conversión a JSON
         print("\n--- Convertir datos a formato JSON ---")
-        datos_json = convertir_a_json(conexion)
+        datos_json = convertir_a_json(conexion, tablas)
         print("Estructura JSON (ejemplo de una tabla):")
         if datos_json:
             # Muestra un ejemplo de la primera tabla encontrada
@@ -169,13 +245,12 @@ if __name__ == "__main__":
 
             # Opcional: guardar los datos en un archivo JSON
             # ruta_json = os.path.join(os.path.dirname(__file__), 'ventas_comerciales.json')
-            # with open(ruta_json, 'w', encoding='utf-8') as f:
-            #     json.dump(datos_json, f, ensure_ascii=False, indent=2)
+            # exportar_json(conexion, ruta_json, tablas)
             # print(f"Datos guardados en {ruta_json}")
 
         # Conversión a DataFrames de pandas
         print("\n--- Convertir datos a DataFrames de pandas ---")
-        dataframes = convertir_a_dataframes(conexion)
+        dataframes = convertir_a_dataframes(conexion, tablas)
         if dataframes:
             print(f"Se han creado {len(dataframes)} DataFrames:")
             for nombre, df in dataframes.items():
@@ -7,8 +7,10 @@ import pytest
 import sqlite3
 import os
 import json
+import shutil
 import pandas as pd
-from ej3a3 import conectar_bd, convertir_a_json, convertir_a_dataframes
+import ej3a3
+from ej3a3 import conectar_bd, convertir_a_json, exportar_json, convertir_a_dataframes
 
 # Path to database file
 DB_PATH = os.path.join(os.path.dirname(__file__), 'ventas_comerciales.db')
@@ -260,6 +262,19 @@ def test_convertir_a_json_data(conexion_bd):
 
         assert venta_con_producto_valido, "No se encontró ninguna venta con referencia a un producto válido"
 
+def test_exportar_json(conexion_bd, tmp_path):
+    """
+    Prueba la función exportar_json
+    Verifica que el archivo generado contiene los mismos datos que convertir_a_json
+    """
+    ruta_json = tmp_path / "ventas.json"
+    exportar_json(conexion_bd, str(ruta_json))
+
+    with open(ruta_json, encoding="utf-8") as f:
+        datos_archivo = json.load(f)
+
+    assert datos_archivo == convertir_a_json(conexion_bd)
+
 def test_convertir_a_dataframes(conexion_bd):
     """
     Prueba la función convertir_a_dataframes
@@ -281,6 +296,72 @@ def test_convertir_a_dataframes(conexion_bd):
     # Verificar que tiene al menos una consulta combinada (con '_' o 'join' en el nombre)
     assert any(key for key in dataframes if "_" in key or "join" in key.lower())
 
+def test_convertir_a_dataframes_subconjunto(conexion_bd):
+    """
+    Prueba convertir_a_dataframes con una lista de tablas que no incluye 'ventas'
+    Las vistas combinadas deben seguir teniendo todas las columnas de ventas
+    """
+    dataframes = convertir_a_dataframes(conexion_bd, ['productos', 'regiones'])
+
+    assert 'ventas' not in dataframes
+    assert 'productos' in dataframes
+
+    columnas_ventas = [fila[1] for fila in conexion_bd.execute("PRAGMA table_info(ventas)")]
+    assert dataframes['ventas_vendedores'].columns.tolist() == columnas_ventas + ['vendedor_nombre']
+
+# Consultas INNER JOIN independientes de las que se derivan las vistas combinadas
+CONSULTAS_COMBINADAS = {
+    'ventas_productos': """
+        SELECT v.*, p.nombre as producto_nombre, p.categoria, p.precio_unitario
+        FROM ventas v
+        JOIN productos p ON v.producto_id = p.id
+    """,
+    'ventas_vendedores': """
+        SELECT v.*, vd.nombre as vendedor_nombre
+        FROM ventas v
+        JOIN vendedores vd ON v.vendedor_id = vd.id
+    """,
+    'ventas_completas': """
+        SELECT v.*, p.nombre as producto_nombre, p.categoria, p.precio_unitario,
+               vd.nombre as vendedor_nombre, r.nombre as region_nombre, r.pais
+        FROM ventas v
+        JOIN productos p ON v.producto_id = p.id
+        JOIN vendedores vd ON v.vendedor_id = vd.id
+        JOIN regiones r ON vd.region_id = r.id
+    """,
+}
+
+def test_convertir_a_dataframes_ventas_sin_correspondencia(tmp_path, monkeypatch):
+    """
+    Prueba que las ventas sin producto o sin vendedor no cambian el resultado de las
+    vistas combinadas: mismas filas y mismos tipos que cada INNER JOIN por separado
+    """
+    # Copia temporal de la base de datos para no modificar la original
+    ruta = tmp_path / 'ventas_comerciales.db'
+    shutil.copy(DB_PATH, ruta)
+    monkeypatch.setattr(ej3a3, 'DB_PATH', str(ruta))
+
+    conn = conectar_bd()
+    try:
+        # Una venta sin producto y otra sin vendedor: NULL si la columna lo admite (así está
+        # en ventas_comerciales.db) o, si no, un id que no existe
+        not_null = {fila[1]: fila[3] for fila in conn.execute("PRAGMA table_info(ventas)")}
+        producto_sin = 999999 if not_null['producto_id'] else None
+        vendedor_sin = 999999 if not_null['vendedor_id'] else None
+        conn.execute("INSERT INTO ventas (fecha, producto_id, vendedor_id, cantidad) VALUES (?, ?, 1, 1)",
+                     ("2024-05-01", producto_sin))
+        conn.execute("INSERT INTO ventas (fecha, producto_id, vendedor_id, cantidad) VALUES (?, 1, ?, 1)",
+                     ("2024-05-02", vendedor_sin))
+
+        dataframes = convertir_a_dataframes(conn)
+
+        for nombre, consulta in CONSULTAS_COMBINADAS.items():
+            esperado = pd.read_sql_query(consulta, conn)
+            assert dataframes[nombre].dtypes.to_dict() == esperado.dtypes.to_dict(), nombre
+            pd.testing.assert_frame_equal(dataframes[nombre], esperado)
+    finally:
+        conn.close()
+
 def test_convertir_a_dataframes_data(conexion_bd):
     """
     Prueba el contenido de los datos convertidos a DataFrames
@@ -78,7 +78,7 @@ def iniciar_mongodb_docker() -> bool:
 
         # Iniciar MongoDB con docker-compose
         result = subprocess.run(
-            ["docker", "compose", "up", "-d"],
+            ["docker", "compose", "up", "-d", "--wait"],
             cwd=current_dir,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
@@ -89,7 +89,7 @@ def iniciar_mongodb_docker() -> bool:
             print(f"Error al iniciar MongoDB: {result.stderr}")
             return False
 
-        # Dar tiempo para que MongoDB se inicie completamente
+        # Dar tiempo a que el replica set elija primario tras inicializarse
         time.sleep(5)
         return True
 
@@ -116,24 +116,41 @@ def detener_mongodb_docker() -> None:
     except Exception as e:
         print(f"Error al detener MongoDB: {e}")
 
+# Cliente compartido por todas las llamadas a crear_conexion: MongoClient mantiene su
+# propio pool de conexiones, así que crearlo una sola vez evita repetir el handshake
+# TCP y la autenticación en cada conexión
+_cliente = None
+
+def _obtener_cliente() -> pymongo.MongoClient:
+    """
+    Devuelve el cliente de MongoDB compartido, creándolo y comprobando la conexión
+    solo la primera vez
+    """
+    global _cliente
+    if _cliente is None:
+        cliente = pymongo.MongoClient(
+            f"mongodb://{MONGODB_USERNAME}:{MONGODB_PASSWORD}@{MONGODB_HOST}:{MONGODB_PORT}/",
+            serverSelectionTimeoutMS=5000,
+            maxPoolSize=50,
+            minPoolSize=5
+        )
+
+        try:
+            cliente.admin.command('ping')
+        except Exception as e:
+            cliente.close()
+            print(f"No se pudo conectar a MongoDB")
+            raise
+
+        _cliente = cliente
+    return _cliente
+
 def crear_conexion() -> pymongo.database.Database:
     """
     Crea y devuelve una conexión a la base de datos MongoDB
     """
     # Debes conectarte a la base de datos MongoDB usando PyMongo
-    client = pymongo.MongoClient(
-        f"mongodb://{MONGODB_USERNAME}:{MONGODB_PASSWORD}@{MONGODB_HOST}:{MONGODB_PORT}/",
-        serverSelectionTimeoutMS=5000
-    )
-
-    try:
-        client.admin.command('ping')
-    except Exception as e:
-        print(f"No se pudo conectar a MongoDB")
-        raise
-
-    db = client[DB_NAME]
-    return db
+    return _obtener_cliente()[DB_NAME]
 
 def crear_colecciones(db: pymongo.database.Database) -> None:
     """
@@ -146,9 +163,10 @@ def crear_colecciones(db: pymongo.database.Database) -> None:
     # 2. Crear colección de libros con índices
     db.autores.create_index("nombre", unique=True)
 
-    db.libros.create_index([("titulo")])
-    db.libros.create_index([("autor_id")])
-    db.libros.create_index([("anio")])
+    # Índices compuestos: resuelven el filtro por autor y la ordenación en el propio índice.
+    # Ambos empiezan por autor_id, así que no hace falta un índice simple sobre ese campo
+    db.libros.create_index([("autor_id", 1), ("anio", 1)])
+    db.libros.create_index([("autor_id", 1), ("titulo", 1)])
 
 def insertar_autores(db: pymongo.database.Database, autores: List[Tuple[str]]) -> List[str]:
     """
@@ -160,7 +178,8 @@ def insertar_autores(db: pymongo.database.Database, autores: List[Tuple[str]]) -
     # 3. Devolver los IDs como strings
     docs_autores = [{"nombre": autor[0]} for autor in autores]
 
-    resultado = db.autores.insert_many(docs_autores)
+    # ordered=False: el servidor no serializa las inserciones ni se detiene en el primer error
+    resultado = db.autores.insert_many(docs_autores, ordered=False)
 
     return [str(id) for id in resultado.inserted_ids]
 
@@ -181,7 +200,7 @@ def insertar_libros(db: pymongo.database.Database, libros: List[Tuple[str, int,
         for libro in libros
     ]
 
-    resultado = db.libros.insert_many(docs_libros)
+    resultado = db.libros.insert_many(docs_libros, ordered=False)
 
     return [str(id) for id in resultado.inserted_ids]
 
@@ -192,34 +211,22 @@ def consultar_libros(db: pymongo.database.Database) -> None:
     # Debes realizar los siguientes pasos:
     # 1. Realizar una agregación para unir libros con autores
     # 2. Mostrar los resultados
-    pipeline = [
-        {
-            "$lookup": {
-                "from": "autores",
-                "localField": "autor_id",
-                "foreignField": "_id",
-                "as": "autor"
-            }
-        },
-        {
-            "$unwind": "$autor"
-        },
-        {
-            "$project": {
-                "titulo": 1,
-                "anio": 1,
-                "autor_nombre": "$autor.nombre"
-            }
-        },
-        {
-            "$sort": {"autor_nombre": 1, "titulo": 1}
-        }
-    ]
-
-    resultados = db.libros.aggregate(pipeline)
-
-    for libro in resultados:
-        print(f"{libro['titulo']} ({libro['anio']}) - {libro['autor_nombre']}")
+    # La colección de autores es pequeña: se lee una vez y el cruce se hace en Python,
+    # evitando un $lookup por cada libro en el servidor
+    autores = {autor["_id"]: autor["nombre"] for autor in db.autores.find({}, {"nombre": 1})}
+
+    # El orden (autor_id, titulo) lo sirve directamente el índice compuesto, que se
+    # fuerza con hint para que el planificador no elija ordenar en memoria
+    libros = db.libros.find(
+        {},
+        {"titulo": 1, "anio": 1, "autor_id": 1}
+    ).sort([("autor_id", 1), ("titulo", 1)]).hint([("autor_id", 1), ("titulo", 1)])
+
+    for libro in libros:
+        # Como hacía $unwind, se omiten los libros sin autor
+        autor_nombre = autores.get(libro.get("autor_id"))
+        if autor_nombre is not None:
+            print(f"{libro['titulo']} ({libro['anio']}) - {autor_nombre}")
 
 def buscar_libros_por_autor(db: pymongo.database.Database, nombre_autor: str) -> List[Tuple[str, int]]:
     """
@@ -248,7 +255,9 @@ def buscar_libros_por_autor(db: pymongo.database.Database, nombre_autor: str) ->
         }
     ]
 
-    libros = list(db.libros.aggregate(pipeline))
+    # El índice (autor_id, anio) resuelve el $match y el $sort; con allowDiskUse=False
+    # la agregación falla en lugar de degradarse a una ordenación en disco
+    libros = list(db.libros.aggregate(pipeline, hint="autor_id_1_anio_1", allowDiskUse=False))
 
     return [(libro["titulo"], libro["anio"]) for libro in libros]
 
@@ -293,40 +302,38 @@ def eliminar_libro(
 
 def ejemplo_transaccion(db: pymongo.database.Database) -> bool:
     """
-    Demuestra el uso de operaciones agrupadas
+    Demuestra el uso de transacciones para operaciones agrupadas
     """
     # Debes realizar los siguientes pasos:
     # 1. Insertar un nuevo autor
     # 2. Insertar dos libros del autor
-    # Intentar limpiar los datos en caso de error
+    # Ambas escrituras forman una transacción multi-documento: o se confirman las dos
+    # o ninguna. Requiere que MongoDB se ejecute como replica set (ver docker-compose.yml)
     try:
-        autor_result = db.autores.insert_one({"nombre": "Miguel de Cervantes"})
-        autor_id = autor_result.inserted_id
-
-        libros = [
-            {
-                "titulo": "Don Quijote de la Mancha",
-                "anio": 1605,
-                "autor_id": autor_id
-            },
-            {
-                "titulo": "Novelas ejemplares",
-                "anio": 1613,
-                "autor_id": autor_id
-            }
-        ]
-        db.libros.insert_many(libros)
+        with db.client.start_session() as session:
+            with session.start_transaction():
+                autor_result = db.autores.insert_one({"nombre": "Miguel de Cervantes"}, session=session)
+                autor_id = autor_result.inserted_id
+
+                libros = [
+                    {
+                        "titulo": "Don Quijote de la Mancha",
+                        "anio": 1605,
+                        "autor_id": autor_id
+                    },
+                    {
+                        "titulo": "Novelas ejemplares",
+                        "anio": 1613,
+                        "autor_id": autor_id
+                    }
+                ]
+                db.libros.insert_many(libros, session=session)
 
         return True
 
-    except Exception as e:
-        print(f"Error en la operación: {e}")
-        try:
-            if 'autor_id' in locals():
-                db.autores.delete_one({"_id": autor_id})
-                db.libros.delete_many({"autor_id": autor_id})
-        except:
-            pass
+    except pymongo.errors.PyMongoError as e:
+        # Al salir del bloque con una excepción la transacción se aborta automáticamente
+        print(f"Error en la transacción, cambios revertidos: {e}")
         return False
 
 
@@ -0,0 +1,47 @@
+"""
+Shared fixtures for the Flask-SQLAlchemy tests (ej3b2_test.py, ej3b3_test.py).
+
+Each test module imports its own ``create_app`` and ``db``; the fixtures below pick them
+up from the requesting module, so the SAVEPOINT isolation is defined only here.
+"""
+
+import pytest
+from flask import Flask
+from sqlalchemy import event
+from sqlalchemy.orm import scoped_session, sessionmaker
+
+
+@pytest.fixture(scope="module")
+def app(request) -> Flask:
+    """Create the test module's application and its in-memory schema once per module"""
+    db = request.module.db
+    app = request.module.create_app({"TESTING": True})
+
+    with app.app_context():
+        # The in-memory database has a single connection that already exists, so it is
+        # configured here: SQLAlchemy emits BEGIN itself instead of pysqlite opening the
+        # transaction lazily, otherwise releasing a SAVEPOINT would commit the test's data
+        with db.engine.connect() as connection:
+            connection.connection.driver_connection.isolation_level = None
+        event.listen(db.engine, "begin", lambda connection: connection.exec_driver_sql("BEGIN"))
+
+    return app
+
+
+@pytest.fixture
+def db_session(app, request, monkeypatch):
+    """Bind the module's db.session to a transaction that is rolled back after the test"""
+    db = request.module.db
+    with app.app_context():
+        connection = db.engine.connect()
+        transaction = connection.begin()
+        # Commits made by the endpoints only release a SAVEPOINT
+        monkeypatch.setattr(db, "session", scoped_session(
+            sessionmaker(bind=connection, join_transaction_mode="create_savepoint")))
+
+        yield db.session
+
+        # Discard everything the test wrote
+        db.session.remove()
+        transaction.rollback()
+        connection.close()
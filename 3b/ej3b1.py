@@ -13,9 +13,10 @@ Implementa un sistema simple de gestión de biblioteca utilizando SQLAlchemy par
 Este ejercicio se enfoca en SQLAlchemy Core y ORM sin depender de Flask u otro framework web.
 """
 
-from sqlalchemy import create_engine, Column, Integer, String, ForeignKey, Table, inspect
+from sqlalchemy import create_engine, Column, Integer, String, ForeignKey, Table, Index, inspect, select, insert, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship, joinedload
+from sqlalchemy.orm import sessionmaker, relationship, joinedload, contains_eager
 
 # Crea el motor de base de datos (usamos SQLite en memoria para simplificar)
 engine = create_engine('sqlite:///:memory:', echo=True)
@@ -37,7 +38,7 @@ class Author(Base):
     # - Una relación con los libros (books) usando relationship
     __tablename__ = "authors"
     id = Column(Integer, primary_key=True, autoincrement=True)
-    name = Column(String, nullable=False)
+    name = Column(String, nullable=False, unique=True)
     books = relationship("Book", back_populates="author")
 
 
@@ -50,6 +51,9 @@ class Book(Base):
     # - author_id: clave foránea que relaciona con la tabla 'authors'
     # - Una relación con el autor usando relationship
     __tablename__ = "books"
+    # Índice compuesto para las búsquedas y JOINs por autor; al empezar por author_id
+    # también sirve como índice de la clave foránea
+    __table_args__ = (Index("ix_books_author_title", "author_id", "title"),)
     id = Column(Integer, primary_key=True, autoincrement=True)
     title = Column(String, nullable=False)
     year = Column(Integer, nullable=True)
@@ -99,45 +103,95 @@ def create_book(session, title, author_name, year=None):
     # Crea un nuevo libro asociado al autor
     # Añade y haz commit a la sesión
     # Retorna el libro creado
-    author = session.query(Author).filter_by(name=author_name).first()
-
-    if not author:
-        author = Author(name=author_name)
-        session.add(author)
-        session.flush()
-    
-    book = Book(title=title, year=year, author_id=author.id)
+    # INSERT ... ON CONFLICT DO NOTHING RETURNING id crea el autor y devuelve su id en
+    # una sola sentencia; si ya existía no devuelve filas y se consulta su id
+    author_id = session.execute(
+        sqlite_insert(Author)
+        .values(name=author_name)
+        .on_conflict_do_nothing(index_elements=["name"])
+        .returning(Author.id)
+    ).scalar()
+    if author_id is None:
+        author_id = session.scalar(select(Author.id).where(Author.name == author_name))
+
+    book = Book(title=title, year=year, author_id=author_id)
     session.add(book)
     session.commit()
     return book
 
+def create_books(session, books):
+    """
+    Crea varios libros de una sola vez a partir de tuplas (title, author_name, year)
+    Los autores que no existan se crean; retorna el número de libros creados
+    """
+    books = list(books)
+    if not books:
+        return 0
+
+    # Todos los autores con una sola sentencia (los existentes se ignoran)
+    # y una sola consulta para obtener sus ids
+    author_names = {author_name for _, author_name, _ in books}
+    session.execute(
+        sqlite_insert(Author).on_conflict_do_nothing(index_elements=["name"]),
+        [{"name": name} for name in author_names]
+    )
+    author_ids = dict(session.execute(
+        select(Author.name, Author.id).where(Author.name.in_(author_names))
+    ).all())
+
+    # Un único INSERT ejecutado por lotes (executemany) y un único commit
+    session.execute(
+        insert(Book),
+        [
+            {"title": title, "year": year, "author_id": author_ids[author_name]}
+            for title, author_name, year in books
+        ]
+    )
+    session.commit()
+    return len(books)
+
 def get_all_books(session):
     """Obtiene todos los libros con sus autores"""
     # Consulta todos los libros y carga también los autores (joinedload)
     # Retorna la lista de libros
-    return session.query(Book).all()
+    # joinedload trae los autores en la misma consulta y evita un SELECT por libro
+    return session.query(Book).options(joinedload(Book.author)).all()
 
 
 def get_book_by_id(session, book_id):
     """Obtiene un libro específico por su ID"""
     # Busca un libro por su ID y retórnalo
     # Si no existe, retorna None
-    return session.query(Book).filter_by(id=book_id).first()
+    # session.get consulta primero el mapa de identidad y solo va a la BD si no está
+    return session.get(Book, book_id)
 
 
 def update_book(session, book_id, new_title=None, new_year=None):
-    """Actualiza la información de un libro existente"""
+    """Actualiza la información de un libro existente
+
+    Retorna una fila de Core con (id, title, year, author_id) ya actualizados, no una
+    instancia de Book (no lleva la relación author), o None si el libro no existe.
+    Sin campos nuevos retorna la fila actual sin modificarla
+    """
     # Busca el libro por ID
     # Si existe, actualiza los campos que tienen nuevos valores
     # Haz commit a la sesión
     # Retorna el libro actualizado o None si no existe
-    book = session.query(Book).filter_by(id=book_id).first()
-    if book:
-        if new_title:
-            book.title = new_title
-        if new_year is not None:
-            book.year = new_year
-        session.commit()
+    # Un único UPDATE ... RETURNING: no se carga el libro ni pasa por el flush del ORM
+    changes = {}
+    if new_title:
+        changes["title"] = new_title
+    if new_year is not None:
+        changes["year"] = new_year
+
+    columns = (Book.id, Book.title, Book.year, Book.author_id)
+    if not changes:
+        return session.execute(select(*columns).where(Book.id == book_id)).first()
+
+    book = session.execute(
+        update(Book).where(Book.id == book_id).values(**changes).returning(*columns)
+    ).first()
+    session.commit()
     return book
 
 
@@ -145,7 +199,7 @@ def delete_book(session, book_id):
     """Elimina un libro de la base de datos"""
     # Busca el libro por ID
     # Si existe, elimínalo y haz commit
-    book = session.query(Book).filter_by(id=book_id).first()
+    book = session.get(Book, book_id)
     if book:
         session.delete(book)
         session.commit()
@@ -156,7 +210,14 @@ def find_books_by_author(session, author_name):
     # Consulta los libros uniendo (join) con la tabla de autores
     # Filtra por el nombre del autor
     # Retorna la lista de libros
-    return session.query(Book).join(Author).filter(Author.name==author_name).all()
+    # contains_eager reutiliza el JOIN del filtro para rellenar book.author
+    return (
+        session.query(Book)
+        .join(Book.author)
+        .options(contains_eager(Book.author))
+        .filter(Author.name == author_name)
+        .all()
+    )
 
 
 # Función principal para demostrar el uso de SQLAlchemy
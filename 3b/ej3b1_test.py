@@ -1,25 +1,75 @@
+import os
 import pytest
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
 
-from ej3b1 import (Base, Author, Book, setup_database, create_book, get_all_books,
+from ej3b1 import (Base, Author, Book, setup_database, create_book, create_books, get_all_books,
                   get_book_by_id, update_book, delete_book, find_books_by_author)
 
 
-@pytest.fixture
-def session():
-    """Create an isolated in-memory database and session for testing"""
-    # Use a different database for tests
-    engine = create_engine('sqlite:///:memory:', echo=False)
+# Shared-cache in-memory database: it lives as long as the engine keeps a connection open,
+# so the schema is built once per test session instead of once per test.
+# Set TEST_DB_URL in the environment to run the suite against another database
+TEST_DB_URL = os.environ.get("TEST_DB_URL", "sqlite:///file::memory:?cache=shared&uri=true")
+
+
+@pytest.fixture(scope="session")
+def engine():
+    """Create the test engine and the schema once for the whole test session"""
+    engine = create_engine(TEST_DB_URL, echo=False)
+
+    if engine.dialect.name == "sqlite":
+        @event.listens_for(engine, "connect")
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            # No journal on disk and no fsync: the test database is disposable
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA journal_mode=MEMORY")
+            cursor.execute("PRAGMA synchronous=OFF")
+            cursor.execute("PRAGMA temp_store=MEMORY")
+            cursor.execute("PRAGMA foreign_keys=ON")
+            cursor.close()
+            # Let SQLAlchemy emit BEGIN itself: pysqlite would otherwise only open the transaction
+            # on the first DML, and releasing the test's SAVEPOINT would commit it
+            dbapi_connection.isolation_level = None
+
+        @event.listens_for(engine, "begin")
+        def do_begin(connection):
+            connection.exec_driver_sql("BEGIN")
+
     Base.metadata.create_all(engine)
-    SessionLocal = sessionmaker(bind=engine)
-    session = SessionLocal()
+    yield engine
+    Base.metadata.drop_all(engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def session(engine):
+    """Provide a session whose work is rolled back at the end of the test"""
+    connection = engine.connect()
+    transaction = connection.begin()
+    # session.commit() inside the code under test only releases a SAVEPOINT
+    session = Session(bind=connection, join_transaction_mode="create_savepoint")
 
     yield session
 
-    # Clean up after test
     session.close()
-    Base.metadata.drop_all(engine)
+    transaction.rollback()
+    connection.close()
+
+
+@pytest.fixture
+def queries(engine):
+    """Collect every SQL statement executed on the test engine during a test"""
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        # The SAVEPOINTs used for test isolation are not queries of the code under test
+        if not statement.startswith(("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")):
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(engine, "before_cursor_execute", record)
 
 
 def test_create_book(session):
@@ -55,6 +105,26 @@ def test_create_book_existing_author(session):
     assert book.author.id == author.id
 
 
+def test_create_books(session):
+    """Test creating several books at once, reusing and creating authors"""
+    session.add(Author(name="Existing Author"))
+    session.commit()
+
+    created = create_books(session, [
+        ("Book 1", "Existing Author", 2021),
+        ("Book 2", "New Author", 2022),
+        ("Book 3", "New Author", None),
+    ])
+
+    assert created == 3
+    assert session.query(Author).count() == 2
+    books = {b.title: b for b in session.query(Book).all()}
+    assert books["Book 1"].author.name == "Existing Author"
+    assert books["Book 2"].author.name == "New Author"
+    assert books["Book 3"].year is None
+    assert books["Book 3"].author_id == books["Book 2"].author_id
+
+
 def test_get_all_books(session):
     """Test retrieving all books"""
     # Create test data
@@ -76,6 +146,20 @@ def test_get_all_books(session):
     assert {b.author.name for b in books} == {"Author 1", "Author 2"}
 
 
+def test_get_all_books_loads_authors_eagerly(session, queries):
+    """Test that accessing book.author does not issue one query per book (N+1)"""
+    authors = [Author(name=f"Author {i}") for i in range(3)]
+    session.add_all(authors + [Book(title=f"Book {i}", author=a) for i, a in enumerate(authors)])
+    session.commit()
+
+    queries.clear()
+    books = get_all_books(session)
+    names = {b.author.name for b in books}
+
+    assert names == {"Author 0", "Author 1", "Author 2"}
+    assert len(queries) == 1
+
+
 def test_get_book_by_id(session):
     """Test retrieving a specific book by ID"""
     # Create test data
@@ -128,6 +212,18 @@ def test_update_book(session):
     assert db_book.year == 2030
 
 
+def test_update_book_without_changes(session):
+    """Test that update_book without new values returns the current row unchanged"""
+    author = Author(name="Author")
+    book = Book(title="Original Title", year=2020, author=author)
+    session.add_all([author, book])
+    session.commit()
+
+    row = update_book(session, book.id)
+
+    assert (row.id, row.title, row.year, row.author_id) == (book.id, "Original Title", 2020, author.id)
+
+
 def test_update_nonexistent_book(session):
     """Test updating a book that doesn't exist"""
     result = update_book(session, 999, new_title="New Title")
@@ -177,3 +273,17 @@ def test_find_books_by_author(session):
     assert {b.title for b in books} == {"Book 1", "Book 2"}
     for book in books:
         assert book.author.name == "Target Author"
+
+
+def test_find_books_by_author_loads_authors_eagerly(session, queries):
+    """Test that find_books_by_author fills book.author from its own JOIN"""
+    author = Author(name="Target Author")
+    session.add_all([author, Book(title="Book 1", author=author), Book(title="Book 2", author=author)])
+    session.commit()
+
+    queries.clear()
+    books = find_books_by_author(session, "Target Author")
+    names = {b.author.name for b in books}
+
+    assert names == {"Target Author"}
+    assert len(queries) == 1
@@ -14,12 +14,21 @@ Libros:
 2. `POST /books`: Agrega un nuevo libro. El cuerpo de la solicitud debe incluir JSON con campos "title", "author_id", y "year" (opcional).
 3. `DELETE /books/<book_id>`: Elimina un libro específico por su ID.
 4. `PUT /books/<book_id>`: Actualiza la información de un libro existente. El cuerpo puede incluir "title" y/o "year".
+5. `POST /books/bulk`: Agrega varios libros en una sola operación. El cuerpo es una lista JSON de libros.
 
 Esta versión utiliza Flask-SQLAlchemy como ORM para persistir los datos en una base de datos SQLite.
 """
 
-from flask import Flask, jsonify, request
+import json
+import os
+import fastjsonschema
+from fastjsonschema import JsonSchemaValueException
+import orjson
+from flask import Flask, jsonify, request, abort, current_app, has_app_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_compress import Compress
+from sqlalchemy import event, select, insert, update
+from sqlalchemy.orm import raiseload
 
 db = SQLAlchemy()
 
@@ -72,18 +81,70 @@ class Book(db.Model):
         return {"id": self.id, "title": self.title, "year": self.year, "author_id": self.author_id}
 
 
-def create_app():
+def _raise_on_lazy_load(orm_execute_state):
+    """
+    En depuración y pruebas, acceder a una relación que no se cargó en la consulta lanza un
+    error en lugar de lanzar una consulta por objeto (N+1). Se evalúa en cada consulta con la
+    aplicación activa, así que también cubre app.run(debug=True); RAISE_ON_LAZY_LOAD lo fuerza
+    """
+    if not (orm_execute_state.is_select and not orm_execute_state.is_relationship_load
+            and has_app_context()):
+        return
+    activo = current_app.config.get('RAISE_ON_LAZY_LOAD')
+    if activo is None:
+        activo = current_app.debug or current_app.testing
+    if activo:
+        orm_execute_state.statement = orm_execute_state.statement.options(raiseload('*', sql_only=True))
+
+
+# Validador del esquema de libro (book_schema.json, el mismo de ej3b3), compilado una sola
+# vez al importar el módulo; se usa para cada libro de POST /books/bulk
+with open(os.path.join(os.path.dirname(__file__), 'book_schema.json'), 'r') as f:
+    _VALIDATE_BOOK = fastjsonschema.compile(json.load(f))
+
+
+# Columnas que se devuelven de un libro (las mismas que Book.to_dict), para las consultas
+# de lectura que trabajan con filas de Core en lugar de instancias del ORM
+BOOK_COLUMNS = (Book.id, Book.title, Book.year, Book.author_id)
+
+
+def json_response(data, status=200):
+    """
+    Serializa los datos con orjson y los devuelve como respuesta JSON
+    """
+    return current_app.response_class(orjson.dumps(data), status=status, mimetype='application/json')
+
+
+def create_app(test_config=None):
     """
     Crea y configura la aplicación Flask con SQLAlchemy
+    test_config permite sobrescribir la configuración (por ejemplo, en las pruebas)
     """
     app = Flask(__name__)
     
     # Configuración de la base de datos SQLite en memoria
     app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # Sin registro de consultas por petición y con caché de SQL compilado amplia para que
+    # las consultas repetidas de los endpoints no se vuelvan a compilar
+    app.config['SQLALCHEMY_RECORD_QUERIES'] = False
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'query_cache_size': 1200}
+
+    # Comprime las respuestas JSON que lo merecen (los listados); las pequeñas se envían tal cual
+    app.config['COMPRESS_MIMETYPES'] = ['application/json']
+    app.config['COMPRESS_MIN_SIZE'] = 500
+    Compress(app)
+    
+    if test_config is not None:
+        app.config.from_mapping(test_config)
     
     # Inicializa la base de datos con la aplicación
     db.init_app(app)
+
+    # Las cargas perezosas fallan en depuración y pruebas (ver _raise_on_lazy_load). El
+    # listener se registra en la fábrica de sesiones de db, no en la clase Session global
+    if not event.contains(db.session, "do_orm_execute", _raise_on_lazy_load):
+        event.listen(db.session, "do_orm_execute", _raise_on_lazy_load)
     
     # Crea todas las tablas en la base de datos
     with app.app_context():
@@ -99,8 +160,10 @@ def create_app():
         # - Consulta todos los autores
         # - Convierte cada autor a diccionario usando to_dict()
         # - Devuelve la lista en formato JSON
-        authors = Author.query.all()
-        return jsonify([a.to_dict() for a in authors])
+        # Se seleccionan solo las columnas necesarias (sin crear objetos del ORM)
+        # y el JSON se genera con orjson
+        authors = db.session.execute(select(Author.id, Author.name)).mappings()
+        return json_response([dict(a) for a in authors])
 
     @app.route('/authors', methods=['POST'])
     def add_author():
@@ -127,10 +190,17 @@ def create_app():
         # Implementa este endpoint:
         # - Busca el autor por ID (usa get_or_404 para gestionar el error 404)
         # - Devuelve los detalles del autor y su lista de libros
-        author = Author.query.get_or_404(author_id)
-        author_data = author.to_dict()
-        author_data['books'] = [book.to_dict() for book in author.books]
-        return jsonify(author_data)
+        # Dos consultas de columnas (autor y sus libros) sin crear objetos del ORM;
+        # el JSON se genera directamente con orjson
+        author = db.session.execute(
+            select(Author.id, Author.name).where(Author.id == author_id)
+        ).mappings().one_or_none()
+        if author is None:
+            abort(404)
+        books = db.session.execute(
+            select(*BOOK_COLUMNS).where(Book.author_id == author_id)
+        ).mappings()
+        return json_response({**author, 'books': [dict(b) for b in books]})
 
     # Endpoints de Libros
     @app.route('/books', methods=['GET'])
@@ -142,9 +212,8 @@ def create_app():
         # - Consulta todos los libros
         # - Convierte cada libro a diccionario
         # - Devuelve la lista en formato JSON
-        
-        books = Book.query.all()
-        return jsonify([b.to_dict() for b in books])
+        books = db.session.execute(select(*BOOK_COLUMNS)).mappings()
+        return json_response([dict(b) for b in books])
 
     @app.route('/books', methods=['POST'])
     def add_book():
@@ -158,7 +227,7 @@ def create_app():
         # - Lo guarda en la base de datos
         # - Devuelve el libro creado con código 201
         data = request.get_json()
-        author = Author.query.get_or_404(data['author_id'])  # Verify author exists
+        author = db.get_or_404(Author, data['author_id'])  # Verify author exists
         book = Book(
             title=data['title'],
             author_id=data['author_id'],
@@ -168,6 +237,39 @@ def create_app():
         db.session.commit()
         return jsonify(book.to_dict()), 201
 
+    @app.route('/books/bulk', methods=['POST'])
+    def add_books_bulk():
+        """
+        Agrega varios libros en una sola operación
+        El cuerpo de la solicitud debe ser una lista JSON de libros con "title", "author_id" y "year" (opcional)
+        """
+        # Se comprueban todos los autores con una sola consulta y los libros se insertan
+        # con un único INSERT por lotes y un único commit
+        data = request.get_json(silent=True)
+        # El cuerpo se valida entero antes de consultar los autores: una lista de libros
+        # que cumplen el esquema (title no vacío, author_id entero, year entero u omitido)
+        if not isinstance(data, list):
+            abort(400, description="Se esperaba una lista de libros")
+        try:
+            for book in data:
+                _VALIDATE_BOOK(book)
+        except JsonSchemaValueException as e:
+            abort(400, description=f"Error de validación: {e.message}")
+        rows = [
+            {"title": book['title'], "author_id": book['author_id'], "year": book.get('year')}
+            for book in data
+        ]
+
+        author_ids = {row["author_id"] for row in rows}
+        existing_ids = set(db.session.scalars(select(Author.id).where(Author.id.in_(author_ids))))
+        if author_ids - existing_ids:
+            abort(404)
+
+        if rows:
+            db.session.execute(insert(Book), rows)
+            db.session.commit()
+        return jsonify({"created": len(rows)}), 201
+
     @app.route('/books/<int:book_id>', methods=['GET'])
     def get_book(book_id):
         """
@@ -176,8 +278,10 @@ def create_app():
         # Implementa este endpoint:
         # - Busca el libro por ID (usa get_or_404 para gestionar el error 404)
         # - Devuelve los detalles del libro
-        book = Book.query.get_or_404(book_id)
-        return jsonify(book.to_dict())
+        book = db.session.execute(select(*BOOK_COLUMNS).where(Book.id == book_id)).mappings().first()
+        if book is None:
+            abort(404)
+        return json_response(dict(book))
 
     @app.route('/books/<int:book_id>', methods=['DELETE'])
     def delete_book(book_id):
@@ -188,7 +292,7 @@ def create_app():
         # - Busca el libro por ID (usa get_or_404)
         # - Elimina el libro de la base de datos
         # - Devuelve respuesta vacía con código 204
-        book = Book.query.get_or_404(book_id)
+        book = db.get_or_404(Book, book_id)
         db.session.delete(book)
         db.session.commit()
         return '', 204
@@ -205,16 +309,21 @@ def create_app():
         # - Actualiza los campos proporcionados (título y/o año)
         # - Guarda los cambios en la base de datos
         # - Devuelve el libro actualizado
-        book = Book.query.get_or_404(book_id)
         data = request.get_json()
+        changes = {field: data[field] for field in ('title', 'year') if field in data}
 
-        if 'title' in data:
-            book.title = data['title']
-        if 'year' in data:
-            book.year = data['year']
+        # Un único UPDATE ... RETURNING en lugar de SELECT + UPDATE a través del ORM
+        if changes:
+            book = db.session.execute(
+                update(Book).where(Book.id == book_id).values(**changes).returning(*BOOK_COLUMNS)
+            ).mappings().first()
+        else:
+            book = db.session.execute(select(*BOOK_COLUMNS).where(Book.id == book_id)).mappings().first()
+        if book is None:
+            abort(404)
 
         db.session.commit()
-        return jsonify(book.to_dict())
+        return json_response(dict(book))
 
     return app
 
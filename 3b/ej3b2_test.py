@@ -1,35 +1,31 @@
+import gzip
+import json
 import pytest
-from flask import Flask
 from flask.testing import FlaskClient
-from ej3b2 import create_app, db, Author, Book
+from sqlalchemy import event, insert
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import Session
+from ej3b2 import create_app, db, Author, Book, _raise_on_lazy_load
 
 @pytest.fixture
-def client() -> FlaskClient:
-    app = create_app()
-    app.testing = True
-
-    # Create application context and set up database for testing
-    with app.app_context():
-        db.create_all()  # Create tables for testing
-
-        # Add some test data
-        author1 = Author(name="Gabriel García Márquez")
-        author2 = Author(name="Isabel Allende")
-        db.session.add_all([author1, author2])
-        db.session.commit()
-
-        # Add books
-        book1 = Book(title="Cien años de soledad", year=1967, author_id=author1.id)
-        book2 = Book(title="El amor en los tiempos del cólera", year=1985, author_id=author1.id)
-        book3 = Book(title="La casa de los espíritus", year=1982, author_id=author2.id)
-        db.session.add_all([book1, book2, book3])
-        db.session.commit()
-
-        yield app.test_client()  # Provide the test client
-
-        # Clean up after test
-        db.session.remove()
-        db.drop_all()
+def client(app, db_session) -> FlaskClient:
+    # The test runs inside a transaction that is rolled back (see conftest.py)
+    # Same lazy-load guard that create_app installs on the app's own session factory
+    event.listen(db_session.session_factory, "do_orm_execute", _raise_on_lazy_load)
+
+    # Add some test data with one executemany INSERT per table (no ORM flush)
+    db_session.execute(insert(Author), [
+        {"id": 1, "name": "Gabriel García Márquez"},
+        {"id": 2, "name": "Isabel Allende"},
+    ])
+    db_session.execute(insert(Book), [
+        {"id": 1, "title": "Cien años de soledad", "year": 1967, "author_id": 1},
+        {"id": 2, "title": "El amor en los tiempos del cólera", "year": 1985, "author_id": 1},
+        {"id": 3, "title": "La casa de los espíritus", "year": 1982, "author_id": 2},
+    ])
+    db_session.commit()
+
+    return app.test_client()  # Provide the test client
 
 # Tests for Author endpoints
 def test_get_authors(client):
@@ -41,6 +37,33 @@ def test_get_authors(client):
     assert any(author["name"] == "Gabriel García Márquez" for author in data)
     assert any(author["name"] == "Isabel Allende" for author in data)
 
+def test_lazy_load_raises_when_testing(client):
+    """Test that lazy-loading a relationship fails under TESTING instead of issuing N+1 queries"""
+    author = db.session.get(Author, 1)
+    with pytest.raises(InvalidRequestError):
+        author.books
+
+def test_lazy_load_raises_when_debug_enabled_later(app, client, monkeypatch):
+    """Test that the guard follows DEBUG when it is turned on after create_app (app.run(debug=True))"""
+    monkeypatch.setitem(app.config, "TESTING", False)
+    monkeypatch.setitem(app.config, "DEBUG", True)
+    author = db.session.get(Author, 1)
+    with pytest.raises(InvalidRequestError):
+        author.books
+
+def test_lazy_load_allowed_when_disabled(app, client, monkeypatch):
+    """Test that RAISE_ON_LAZY_LOAD=False overrides DEBUG/TESTING and lazy loading works"""
+    monkeypatch.setitem(app.config, "RAISE_ON_LAZY_LOAD", False)
+    author = db.session.get(Author, 1)
+    assert len(author.books) == 2
+
+def test_lazy_load_guard_is_not_global(app, client):
+    """Test that sessions not created by the app's factories are not affected by the guard"""
+    # A plain Session on the test connection (the in-memory database has only one)
+    with Session(bind=db.session.get_bind(), join_transaction_mode="create_savepoint") as session:
+        author = session.get(Author, 1)
+        assert len(author.books) == 2
+
 def test_add_author(client):
     """Test POST /authors to add a new author"""
     response = client.post("/authors", json={"name": "Ernest Hemingway"})
@@ -83,6 +106,62 @@ def test_get_books(client):
     assert "Cien años de soledad" in titles
     assert "La casa de los espíritus" in titles
 
+def test_get_books_compressed(client):
+    """Test GET /books is gzip-compressed once the listing is large enough"""
+    client.post("/books/bulk", json=[
+        {"title": f"Libro {i}", "year": 2000 + i, "author_id": 1} for i in range(20)
+    ])
+
+    response = client.get("/books", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert len(json.loads(gzip.decompress(response.data))) == 23
+
+def test_add_books_bulk(client):
+    """Test POST /books/bulk to add several books at once"""
+    response = client.post("/books/bulk", json=[
+        {"title": "El coronel no tiene quien le escriba", "author_id": 1, "year": 1961},
+        {"title": "Eva Luna", "author_id": 2}
+    ])
+    assert response.status_code == 201
+    assert response.json["created"] == 2
+
+    # Verify books were added
+    get_response = client.get("/books")
+    assert len(get_response.json) == 5
+    titles = [book["title"] for book in get_response.json]
+    assert "Eva Luna" in titles
+
+def test_add_books_bulk_with_nonexistent_author(client):
+    """Test POST /books/bulk rejects the whole batch if an author does not exist"""
+    response = client.post("/books/bulk", json=[
+        {"title": "Test Book", "author_id": 1},
+        {"title": "Other Book", "author_id": 999}
+    ])
+    assert response.status_code == 404
+
+    # Nothing should have been inserted
+    get_response = client.get("/books")
+    assert len(get_response.json) == 3
+
+@pytest.mark.parametrize("body", [
+    {"title": "Libro", "author_id": 1},  # an object instead of a list
+    [{"title": "Libro"}],  # missing author_id
+    [{"author_id": 1}],  # missing title
+    ["Libro"],  # items that are not objects
+    [{"title": "Libro", "author_id": [1]}],  # unhashable author_id
+    [{"title": "Libro", "author_id": {"a": 1}}],  # unhashable author_id
+    [{"title": "Libro", "author_id": "1"}],  # author_id as a string
+    [{"title": "Libro", "author_id": True}],  # author_id as a boolean
+    [{"title": None, "author_id": 1}],  # null title
+    [{"title": "", "author_id": 1}],  # empty title
+    [{"title": "Libro", "author_id": 1, "year": "1990"}],  # year as a string
+])
+def test_add_books_bulk_with_invalid_body(client, body):
+    """Test POST /books/bulk returns 400 when the body is not a list of books"""
+    response = client.post("/books/bulk", json=body)
+    assert response.status_code == 400
+
 def test_get_book_by_id(client):
     """Test GET /books/<id> to retrieve a specific book"""
     response = client.get("/books/1")
@@ -17,14 +17,19 @@ Requerimientos de error:
 - Debes incluir mensajes claros que indiquen la naturaleza del error
 
 Esta versión utiliza Flask-SQLAlchemy como ORM para persistir los datos en una base de datos SQLite
-y la biblioteca jsonschema para la validación de los datos de entrada.
+y la biblioteca fastjsonschema para la validación de los datos de entrada.
 """
 
 import os
 import json
 from flask import Flask, jsonify, request, abort
 from flask_sqlalchemy import SQLAlchemy
-from jsonschema import validate, ValidationError
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from flask.json.provider import JSONProvider
+import fastjsonschema
+from fastjsonschema import JsonSchemaValueException
+import orjson
 
 # Configura la base de datos
 db = SQLAlchemy()
@@ -55,11 +60,11 @@ class Author(db.Model):
     @classmethod
     def check_schema(cls, data):
         """Valida los datos contra el esquema JSON de autor"""
-        # Implementa este método para validar los datos usando jsonschema.validate()
+        # Implementa este método para validar los datos usando el validador compilado
         try:
-            validate(instance=data, schema=cls.load_schema())
-        except ValidationError as e:
-            raise ValidationError(f"Error de validación: {str(e)}")
+            _VALIDATE_AUTHOR(data)
+        except JsonSchemaValueException as e:
+            raise JsonSchemaValueException(f"Error de validación: {e.message}")
 
     def to_dict(self):
         """Convierte el autor a un diccionario para la respuesta JSON"""
@@ -99,9 +104,9 @@ class Book(db.Model):
         """Valida los datos contra el esquema JSON de libro"""
         # Implementa este método similar a Author.check_schema()
         try:
-            validate(instance=data, schema=cls.load_schema())
-        except ValidationError as e:
-            raise ValidationError(f"Error de validación: {str(e)}")
+            _VALIDATE_BOOK(data)
+        except JsonSchemaValueException as e:
+            raise JsonSchemaValueException(f"Error de validación: {e.message}")
 
     def to_dict(self):
         """Convierte el libro a un diccionario para la respuesta JSON"""
@@ -109,21 +114,58 @@ class Book(db.Model):
         return {"id": self.id, "title": self.title, "year": self.year, "author_id": self.author_id}
 
 
-def create_app():
+# Los esquemas se leen y se compilan una sola vez al importar el módulo, en lugar de
+# abrir y parsear el archivo en cada petición. fastjsonschema genera una función de
+# validación específica para cada esquema, mucho más rápida que recorrer el esquema
+_VALIDATE_AUTHOR = fastjsonschema.compile(Author.load_schema())
+_VALIDATE_BOOK = fastjsonschema.compile(Book.load_schema())
+
+
+class OrjsonProvider(JSONProvider):
+    """
+    Proveedor JSON de Flask basado en orjson (parseo y serialización en C)
+    """
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+def _enable_foreign_keys(dbapi_connection, connection_record):
+    """
+    Activa las claves foráneas en cada conexión (SQLite las trae desactivadas)
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+def create_app(test_config=None):
     """
     Crea y configura la aplicación Flask con SQLAlchemy
+    test_config permite sobrescribir la configuración (por ejemplo, en las pruebas)
     """
     app = Flask(__name__)
+    app.json = OrjsonProvider(app)
     
     # Configuración de la base de datos SQLite en memoria
     app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # Sin registro de consultas por petición y con caché de SQL compilado amplia para que
+    # las consultas repetidas de los endpoints no se vuelvan a compilar
+    app.config['SQLALCHEMY_RECORD_QUERIES'] = False
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'query_cache_size': 1200}
+    
+    if test_config is not None:
+        app.config.from_mapping(test_config)
     
     # Inicializa la base de datos con la aplicación
     db.init_app(app)
     
     # Crea todas las tablas en la base de datos
     with app.app_context():
+        event.listen(db.engine, "connect", _enable_foreign_keys)
         db.create_all()
     
     @app.route('/authors', methods=['POST'])
@@ -162,14 +204,17 @@ def create_app():
         """
         # TODO: Implementa este endpoint según las instrucciones
         try:
-            data = request.get_json()
+            # silent=True devuelve None si el cuerpo no es JSON válido en lugar de lanzar la excepción
+            data = request.get_json(silent=True)
+            if data is None:
+                return jsonify({"error": "El cuerpo de la petición no es un JSON válido"}), 400
             Author.check_schema(data)
             author = Author(name=data["name"])
             db.session.add(author)
             db.session.commit()
             return jsonify(author.to_dict()), 201
-        except ValidationError as e:
-            return jsonify({"error": str(e)}), 400
+        except JsonSchemaValueException as e:
+            return jsonify({"error": e.message}), 400
 
     @app.route('/books', methods=['POST'])
     def add_book():
@@ -220,23 +265,31 @@ def create_app():
         """
         # TODO: Implementa este endpoint según las instrucciones
         try:
-            data = request.get_json()
+            # silent=True devuelve None si el cuerpo no es JSON válido en lugar de lanzar la excepción
+            data = request.get_json(silent=True)
+            if data is None:
+                return jsonify({"error": "El cuerpo de la petición no es un JSON válido"}), 400
             Book.check_schema(data)
-            author = Author.query.get(data["author_id"])
-            if not author:
-                    return jsonify({"error": "No hay ningun autor con ese ID"}), 404
-            
             book = Book(
                 title=data["title"],
                 author_id=data["author_id"],
                 year=data.get('year')
             )
-
             db.session.add(book)
+
+            # No se consulta antes el autor: la clave foránea rechaza el INSERT si no existe
+            try:
+                db.session.flush()
+            except IntegrityError:
+                db.session.rollback()
+                return jsonify({"error": "No existe un autor con el id proporcionado"}), 404
+
+            # La respuesta se construye antes del commit para no recargar el libro después
+            book_data = book.to_dict()
             db.session.commit()
-            return jsonify(book.to_dict()), 201
-        except ValidationError as e:
-            return jsonify({"error": str(e)}), 400
+            return jsonify(book_data), 201
+        except JsonSchemaValueException as e:
+            return jsonify({"error": e.message}), 400
 
     return app
 
@@ -1,29 +1,20 @@
 import pytest
-from flask import Flask
 from flask.testing import FlaskClient
+from sqlalchemy import insert
 from ej3b3 import create_app, db, Author, Book
 import os
 
 @pytest.fixture
-def client() -> FlaskClient:
-    app = create_app()
-    app.testing = True
+def client(app, db_session) -> FlaskClient:
+    # The test runs inside a transaction that is rolled back (see conftest.py)
+    # Add some test data with a single executemany INSERT (no ORM flush)
+    db_session.execute(insert(Author), [
+        {"id": 1, "name": "Gabriel García Márquez"},
+        {"id": 2, "name": "Isabel Allende"},
+    ])
+    db_session.commit()
 
-    # Create application context and set up database for testing
-    with app.app_context():
-        db.create_all()  # Create tables for testing
-
-        # Add some test data
-        author1 = Author(name="Gabriel García Márquez")
-        author2 = Author(name="Isabel Allende")
-        db.session.add_all([author1, author2])
-        db.session.commit()
-
-        yield app.test_client()  # Provide the test client
-
-        # Clean up after test
-        db.session.remove()
-        db.drop_all()
+    return app.test_client()  # Provide the test client
 
 # Tests for schema validation in POST endpoints
 
@@ -51,6 +42,12 @@ def test_add_author_invalid_extra_field(client):
     assert response.status_code == 400
     assert "error" in response.json
 
+def test_add_author_malformed_json(client):
+    """Test POST /authors with a body that is not valid JSON"""
+    response = client.post("/authors", data="{\"name\": ", content_type="application/json")
+    assert response.status_code == 400
+    assert "error" in response.json
+
 def test_add_book_valid(client):
     """Test POST /books with valid data"""
     response = client.post("/books", json={